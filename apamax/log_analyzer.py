@@ -30,7 +30,6 @@ import glob
 import math
 import shutil
 import locale
-import xml.sax.saxutils
 from typing import List, Dict # Python 3 type hints
 
 log = logging.getLogger('loganalyzer')
@@ -107,13 +106,34 @@ Extra items in status line but not here will be added.
 Use | chars to break up sections of related columns
 """
 
+UTC_EPOCH = datetime.datetime(1970, 1, 1)
+"""Naive datetime for the start of the 1970 epoch; subtracting this is a faster equivalent of 
+``dt.replace(tzinfo=datetime.timezone.utc).timestamp()``. """
+
+# these are equivalent to xml.sax.saxutils escape/quoteattr/unescape, but importing that module 
+# pulls in urllib.request (and so ssl, http and email) which is a large part of our startup time
 def escapetext(text):
 	"""HTML/XML escaping for text. """
 	if not isinstance(text, str): text = str(text)
-	return xml.sax.saxutils.escape(text).encode('ascii', 'xmlcharrefreplace').decode('ascii')
+	return text.replace('&', '&amp;').replace('>', '&gt;').replace('<', '&lt;').encode('ascii', 'xmlcharrefreplace').decode('ascii')
 def escapeattr(text): # attributes, including quoting
 	if not isinstance(text, str): text = str(text)
-	return xml.sax.saxutils.quoteattr(text).encode('ascii', 'xmlcharrefreplace').decode('ascii')
+	text = text.replace('&', '&amp;').replace('>', '&gt;').replace('<', '&lt;').replace('\n', '&#10;').replace('\r', '&#13;').replace('\t', '&#9;')
+	if '"' not in text:
+		text = '"%s"' % text
+	elif "'" not in text:
+		text = "'%s'" % text
+	else:
+		text = '"%s"' % text.replace('"', '&quot;')
+	return text.encode('ascii', 'xmlcharrefreplace').decode('ascii')
+def unescapetext(text):
+	"""Reverses escapetext for the named entities (not including character references). """
+	return text.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
+
+def formatDuration(duration):
+	"""Formats a duration in seconds for display to the user. """
+	if duration < 120: return '%d seconds'%duration
+	return '%0.1f minutes' % (duration/60)
 
 class UserError(Exception):
 	""" Indicates an exception that should be display to the user without a stack trace. """
@@ -140,8 +160,10 @@ class LogLine(object):
 	
 	@ivar extraLines: unassigned, or a list of strings which are extra lines logically part of this one (typically for warn/error stacks etc)
 	"""
-	#                          date                                         level     thread        apama-ctrl/std cat  message
-	LINE_REGEX = re.compile(r'(\d\d\d\d-\d\d-\d\d \d\d:\d\d:\d\d[.,]\d\d\d) ([A-Z#]+) +\[([^\]]+)\] ([^-]*)-( <[^>]+>)? (.*)')
+	# only the prefix is matched since the message was already split out by the constructor (no need to scan it twice)
+	# [0-9] rather than \d since it only needs to match ASCII digits, which is faster than checking Unicode digit categories
+	#                          date                                                                level     thread        apama-ctrl/std cat
+	LINE_REGEX = re.compile(r'([0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}[.,][0-9]{3}) ([A-Z#]+) +\[([^\]]+)\] ([^-]*)-( <[^>]+>)? ')
 	
 	__slots__ = ['line', 'lineno', 'message', 'level', '__details', 'extraLines', 'isApamaCtrl'] # be memory-efficient
 	def __init__(self, line, lineno):
@@ -197,7 +219,7 @@ class LogLine(object):
 					'datetimestring':g[0],
 					'thread':g[2],
 					#'logcategory': (g[3] or g[4] or '').strip(),
-					#'messagewithoutcat':g[5],
+					#'messagewithoutcat':self.line[m.end():],
 				}
 				return self.__details
 			else:
@@ -228,9 +250,10 @@ class LogLine(object):
 			if not dts: 
 				log.debug('Cannot find date time string in line: %s', det['datetimestring'], self.line)
 				return None
-			if dts[19:20] == ',': 
-				dts = dts[:19]+'.'+dts[20:] # for german locales
-			d = datetime.datetime.strptime(dts, '%Y-%m-%d %H:%M:%S.%f')
+			# the format was already checked by LINE_REGEX so slice out the fixed-width fields, which is much faster than 
+			# strptime (and also copes with the "," millisecond separator used in german locales)
+			d = datetime.datetime(int(dts[0:4]), int(dts[5:7]), int(dts[8:10]), 
+				int(dts[11:13]), int(dts[14:16]), int(dts[17:19]), int(dts[20:23])*1000)
 			#assert d, line
 		except Exception as ex: # might not be a valid line
 			log.debug('Cannot parse date time from "%s": %s - from line: %s', det['datetimestring'], ex, self.line)
@@ -299,6 +322,8 @@ class CSVStatusWriter(BaseWriter):
 		self.output = self.createFile(self.output_file)
 		
 		self.columns = columns
+		# decide how each column is formatted once, rather than for every value of every line
+		self.columnFormatters = [(k, self.getColumnFormatter(k)) for k in columns]
 		items = list(columns)
 		items[0] = '# '+items[0]
 		if extraInfo:
@@ -312,9 +337,40 @@ class CSVStatusWriter(BaseWriter):
 	def writeStatus(self, status=None, missingItemValue='?', **extra):
 		#assert self.columns
 		#assert status
-		items = [self.formatItem(status.get(k), k, missingItemValue=missingItemValue) for k in self.columns]
+		items = [formatter(status.get(k), missingItemValue) for k, formatter in self.columnFormatters]
 		self.writeCSVLine(items)
 	
+	def getColumnFormatter(self, columnDisplayName):
+		"""
+		Returns a function that converts values in the specified column into strings, 
+		with exactly the same result as formatItem. 
+		
+		The common numeric cases are handled without formatItem's column name checks 
+		and type dispatch, since this is called for every value of every status line. 
+		
+		@param columnDisplayName: The display name of the column. 
+		@return: A function taking (item, missingItemValue) and returning a string. 
+		"""
+		formatItem = self.formatItem
+		def formatAnyItem(item, missingItemValue):
+			return formatItem(item, columnDisplayName, missingItemValue=missingItemValue)
+		
+		# subclasses that customize formatItem, and columns with special formatting, always go through formatItem
+		if type(self).formatItem is not CSVStatusWriter.formatItem or columnDisplayName.endswith(('local datetime', 'epoch secs')):
+			return formatAnyItem
+		
+		def formatNumberItem(item, missingItemValue):
+			if item is None: return missingItemValue
+			itemType = item.__class__
+			if itemType is int: 
+				return f'{item:,}'
+			if itemType is float:
+				if item == 0 or item == 1: return str(item) # same as formatItem's True/False check
+				if abs(item)<1000.0: return f'{item:,.2f}'
+				if abs(item)<math.inf: return f'{int(item):,}'
+			return formatAnyItem(item, missingItemValue)
+		return formatNumberItem
+	
 	def formatItem(self, item, columnDisplayName, missingItemValue='?'):
 		"""
 		Converts numbers and other data types into strings. 
@@ -376,12 +432,14 @@ class JSONStatusWriter(BaseWriter):
 		# write one log line per json line, for ease of testing
 		self.output.write('{"metadata":%s, "status":['%JSONStatusWriter.toMultilineJSON(extraInfo or {}))
 		self.prependComma = False
+		# reuse the same encoder for every line, since json.dumps creates a new one each time it's called with a default= function
+		self.statusEncoder = json.JSONEncoder(default=JSONStatusWriter.encodeCustomObjectAsJSON)
 		
 	def writeStatus(self, status=None, **extra):
 		#assert status
 		# write it out incrementally to avoid excessive memory consumption
 		if self.prependComma: self.output.write(', ')
-		self.output.write(u'\n'+json.dumps(status, default=JSONStatusWriter.encodeCustomObjectAsJSON))
+		self.output.write(u'\n'+self.statusEncoder.encode(status))
 		self.prependComma = True
 
 	def _writeFooter(self, **extra):
@@ -480,6 +538,10 @@ class LogAnalyzer(object):
 	@ivar current: The dictionary of the current log file. 
 	"""
 
+	READ_BUFFER_SIZE = 4*1024*1024
+	"""The size in bytes of the buffer used for reading log files; a large buffer amortizes the cost of
+	read syscalls for the multi-GB log files that are common in production. """
+
 	def __init__(self, args):
 		self.__listeners = {} # key = eventtype, value=list of listeners
 		self.args = args
@@ -488,6 +550,25 @@ class LogAnalyzer(object):
 		self.writers = [CSVStatusWriter(self), ChartDataWriter(self)]
 		if args.json:
 			self.writers.append(JSONStatusWriter(self))
+		
+		self.__linePrefilterSubstrings = []
+		for s in ['Status: ', 'Receiver ', 'External receiver']: # status lines and connection messages
+			self.registerLinePrefilter(s)
+		for prefix in args.userStatusLinePrefixes:
+			# the apama-ctrl prefix isn't in the raw line (and apama-ctrl lines are never skipped anyway)
+			self.registerLinePrefilter(prefix[len('<apama-ctrl> '):] if prefix.startswith('<apama-ctrl> ') else prefix)
+	
+	def registerLinePrefilter(self, substring):
+		"""
+		Registers a substring identifying INFO lines that must be passed to handleLine. 
+		
+		For performance, INFO lines after the startup stanza are skipped without creating a LogLine unless they 
+		contain one of the registered substrings, so subclasses that override handleLine to extract information 
+		from other INFO messages should call this from their constructor. 
+		
+		@param substring: A string that appears in every line of interest, typically the start of the message. 
+		"""
+		self.__linePrefilterSubstrings.append(substring)
 	
 	def processFiles(self, filepaths):
 		for path in filepaths:
@@ -497,24 +578,115 @@ class LogAnalyzer(object):
 			for fp in filepaths
 		]
 		self.handleAllFilesStarted()
-		for file in self.files:
-		
-			while True:
-				try:
-					self.processFile(file=file)
-					break
-				except RestartCurrentFileException as ex:
-					log.info('Restarting current file due to: %s\n', ex)
-					continue
+		jobs = min(getattr(self.args, 'jobs', 1) or os.cpu_count() or 1, len(self.files))
+		if jobs > 1:
+			self.processFilesInParallel(jobs)
+		else:
+			for file in self.files:
+				self._processFileWithRestarts(file)
 					
 		self.handleAllFilesFinished()
 		self.files = None
 
+	def _processFileWithRestarts(self, file):
+		while True:
+			try:
+				self.processFile(file=file)
+				break
+			except RestartCurrentFileException as ex:
+				log.info('Restarting current file due to: %s\n', ex)
+				continue
+
+	def processFilesInParallel(self, jobs):
+		"""
+		Processes each of the files in a pool of worker processes, then merges the results so that the output 
+		is the same as if the files had been processed one at a time. 
+		
+		Each file is processed by a new instance of this analyzer's class, constructed in the worker from 
+		the same args, so any customization of the analyzer must be done by its constructor. 
+		
+		Files whose results depend on other files are processed in this process instead: those with keyed user 
+		status columns (such as apama-ctrl logs), since the mapping from keys to column ids and the number of 
+		columns allocated are shared across all files; those with the same name as another file, since they 
+		write to the same output files; and those that reach the XmaxUniqueWarnOrErrorLines limit, since 
+		which messages are kept depends on earlier files. 
+		
+		@param jobs: The number of worker processes to use. 
+		"""
+		import multiprocessing, pickle
+		
+		# decide up-front where possible, to avoid analyzing such files in a worker only to do it all again here
+		nameCounts = collections.Counter(file['name'] for file in self.files)
+		inThisProcess = [
+			'it has the same name as another file' if nameCounts[file['name']] > 1 else
+			'it may contain keyed user status lines' if self.hasKeyedUserStatusColumns(isApamaCtrl=self.mightBeApamaCtrlFile(file)) else 
+			None
+			for file in self.files]
+		workerFiles = [file for file, reason in zip(self.files, inThisProcess) if not reason]
+		if len(workerFiles) < 2: # a pool would give no concurrency
+			log.info('Analyzing files one at a time since %s', 'they all depend on other files' if not workerFiles 
+				else 'all but one of them depend on other files')
+			for file in self.files:
+				self._processFileWithRestarts(file)
+			return
+		jobs = min(jobs, len(workerFiles))
+		
+		log.info('Analyzing %d files using %d processes', len(self.files), jobs)
+		# only send what's needed to construct a new analyzer, since this one may have state that can't be pickled
+		analyzerBytes = pickle.dumps((type(self), self.args))
+		with multiprocessing.Pool(jobs, initializer=_initFileProcessingWorker, initargs=(analyzerBytes, log.getEffectiveLevel())) as pool:
+			results = pool.imap(_processFileInWorker, workerFiles) # results are in order, while workers run ahead
+			for i in range(len(self.files)):
+				if inThisProcess[i]:
+					log.info('Analyzing %s in this process since %s', self.files[i]['name'], inThisProcess[i])
+					self._processFileWithRestarts(self.files[i])
+					continue
+				result = next(results)
+				if isinstance(result, str):
+					log.info('Analyzing %s again in this process since %s', self.files[i]['name'], result)
+					self._processFileWithRestarts(self.files[i])
+					continue
+				self.files[i], warns, errors = result
+				
+				# merge in file order, applying the same limit on unique messages as handleWarnOrError (the workers 
+				# can't since they don't know which messages were already added by earlier files, but only return 
+				# messages when they didn't reach the limit, so all of this file's messages are here)
+				XmaxUniqueWarnOrErrorLines = self.args.XmaxUniqueWarnOrErrorLines
+				for tracker, fileTracker in [(self.warns, warns), (self.errors, errors)]:
+					for normmsg, byfile in fileTracker.items():
+						if XmaxUniqueWarnOrErrorLines>0 and len(tracker)>=XmaxUniqueWarnOrErrorLines and normmsg not in tracker: continue
+						tracker.setdefault(normmsg, {}).update(byfile)
+
+	def hasKeyedUserStatusColumns(self, isApamaCtrl):
+		"""
+		Returns True if columns for keyed user status lines would be added for a file, in which case the result 
+		depends on earlier files, since the key ids and maxKeysToAllocateColumnsFor are shared across all files. 
+		
+		@param isApamaCtrl: True if the file is (or might be) an apama-ctrl log file. 
+		"""
+		isApamaCtrl = isApamaCtrl or 'true'==os.getenv('APAMA_LOG_ANALYZER_ASSUME_APAMACTRL','')
+		return any('keyRegex' in userConfig and (isApamaCtrl or not msgPrefix[0].startswith('<apama-ctrl> '))
+			for msgPrefix, userConfig in self.args.userStatusLines.items())
+
+	MAX_APAMA_CTRL_DETECTION_BYTES = 1024*1024
+	"""The amount of the start of each file to check for apama-ctrl lines when deciding which files can be 
+	processed in parallel. """
+
+	def mightBeApamaCtrlFile(self, file):
+		"""
+		Returns True if the start of the file suggests it is from apama-ctrl. 
+		
+		This is a heuristic which is only used for deciding which files are processed in parallel. 
+		"""
+		with io.open(file['path'], encoding='utf-8', errors='replace') as f:
+			start = f.read(LogAnalyzer.MAX_APAMA_CTRL_DETECTION_BYTES)
+		return '[apama-ctrl]  ' in start or '[correlator]  ' in start
+
 	def processFile(self, file):
 		"""
 		@param file: The dictionary for the file to be processed. 
 		"""
-		duration = time.time()
+		duration = time.perf_counter()
 		
 		self.currentpath = file['path']
 		self.currentname = file['name']
@@ -530,29 +702,45 @@ class LogAnalyzer(object):
 		
 		skipto = int(self.currentpathbytes*self.args.skip/100) if self.args.skip else None
 		
-		lastprogressupdate = time.time()
+		lastprogressupdate = time.perf_counter()
+		
+		# precompute the line number of the next progress check and the character count at which each percentage is reached, 
+		# so that most lines need only a single comparison
+		progressCheckInterval = 1 if self.currentpathbytes < 10*1000 else 1000
+		nextProgressCheckLineno = progressCheckInterval
+		# can't use tell() on a text file (without inefficiency), so assume 1 byte per char (usually true for ascii) as a rough heuristic; 
+		# there are no thresholds if the size is unknown (e.g. when we're testing against a fake)
+		percentThresholds = [(percent, self.currentpathbytes*percent/100.0) for percent in [25, 50, 75]] if self.currentpathbytes > 0 else []
+		nextPercent, nextPercentCharCount = percentThresholds.pop(0) if percentThresholds else (None, math.inf)
+		
+		# any substring containing another registered substring is redundant, so drop it to minimize the per-line checks
+		prefilterSubstrings = []
+		for s in sorted(set(self.__linePrefilterSubstrings), key=lambda s: (len(s), s)):
+			if not any(p in s for p in prefilterSubstrings): prefilterSubstrings.append(s)
+		prefilterSubstrings = tuple(prefilterSubstrings)
 		
-		with io.open(self.currentpath, encoding='utf-8', errors='replace') as f:
+		with io.open(self.currentpath, encoding='utf-8', errors='replace', buffering=LogAnalyzer.READ_BUFFER_SIZE) as f:
 			self.__currentfilehandle = f
 			charcount = 0
 			lineno = 0
 			previousLine = None
+			ignoredLine = None # (line, lineno) of the most recent line skipped by the prefilter, if it's not yet been superseded
 			startTime = None
 			stripPrefix = None
 			for line in f:
 				lineno += 1
 				charcount += len(line)
 				
-				if self.currentpathbytes < 10*1000 or lineno % 1000 == 0: # don't do it too often for large files
-					# can't use tell() on a text file (without inefficiency), so assume 1 byte per char (usually true for ascii) as a rough heuristic
-					percent = 100.0*charcount / (self.currentpathbytes or -1) # (-1 is to avoid div by zero when we're testing against a fake)
-					for threshold in [25, 50, 75]:
-						if percent >= threshold and lastpercent < threshold:
-							self.handleFilePercentComplete(file=file, percent=threshold)
-							lastpercent = threshold
-					if time.time()-lastprogressupdate > 5:
+				if lineno >= nextProgressCheckLineno: # don't do it too often for large files
+					nextProgressCheckLineno = lineno+progressCheckInterval
+					while charcount >= nextPercentCharCount:
+						self.handleFilePercentComplete(file=file, percent=nextPercent)
+						lastpercent = nextPercent
+						nextPercent, nextPercentCharCount = percentThresholds.pop(0) if percentThresholds else (None, math.inf)
+					if time.perf_counter()-lastprogressupdate > 5:
+						percent = 100.0*charcount / (self.currentpathbytes or -1) # (-1 is to avoid div by zero when we're testing against a fake)
 						log.info(f'   {percent:0.1f}% through this file')
-						lastprogressupdate = time.time()
+						lastprogressupdate = time.perf_counter()
 				
 				self.currentlineno = lineno
 				
@@ -567,6 +755,19 @@ class LogAnalyzer(object):
 				if stripPrefix is not None and line.startswith(stripPrefix): 
 					line = line[len(stripPrefix):]
 				
+				# skip uninteresting INFO lines (the vast majority) without creating a LogLine or calling handleLine
+				if (line[24:25] == 'I' and previousLine is not None and not skipto and not file['inStartupStanza'] 
+						and line[0].isdigit() and ' - ' in line):
+					for s in prefilterSubstrings:
+						if s in line: break
+					else:
+						ignoredLine = (line, lineno)
+						continue
+				if ignoredLine is not None:
+					# handleLine would have made the skipped line the previous line
+					previousLine = finalLineWithTimestamp = LogLine(*ignoredLine)
+					ignoredLine = None
+				
 				try:
 					logline = LogLine(line, lineno)
 					# skip once we've got past the startup stanza - first status line is a good way to detect when that's happened
@@ -596,6 +797,8 @@ class LogAnalyzer(object):
 				except Exception as e:
 					log.exception(f'Failed to handle {os.path.basename(self.currentpath)} line {self.currentlineno}: {line} - ')
 					raise
+			if ignoredLine is not None:
+				finalLineWithTimestamp = LogLine(*ignoredLine)
 			if finalLineWithTimestamp is not None:
 				file['endTime'] = finalLineWithTimestamp.getDateTime()
 
@@ -605,9 +808,9 @@ class LogAnalyzer(object):
 				self.handleFilePercentComplete(file=file, percent=threshold)
 		self.handleFileFinished(file=file)
 
-		duration = time.time()-duration
+		duration = time.perf_counter()-duration
 		if duration > 10:
-			log.info('Completed analysis of %s in %s', os.path.basename(self.currentpath), (('%d seconds'%duration) if duration < 120 else ('%0.1f minutes' % (duration/60))))
+			log.info('Completed analysis of %s in %s', os.path.basename(self.currentpath), formatDuration(duration))
 		
 		self.currentlineno = -1
 		self.__currentfilehandle = None
@@ -634,6 +837,7 @@ class LogAnalyzer(object):
 	def handleFileStarted(self, file, **extra):
 		# for handleRawStatusDict
 		self.columns = None # ordered dict of key:annotated_displayname
+		self.columnCalculators = None # list of tuples describing how to populate each column, see decideColumnCalculators
 		self.previousRawStatus = None # the previous raw status
 		self.userStatus = {}
 		self.previousUserStatus = {}
@@ -779,6 +983,11 @@ class LogAnalyzer(object):
 				userStatusConfig[f'cachedForId.{id}'] = userStatusConfigPerId
 			return userStatusConfigPerId
 	
+	STATUS_LINE_KEY_VALUE_REGEX = re.compile(
+		# Matches one key=value or key="string value" item from a status line, plus any separator characters after it. 
+		# Keys may contain anything but "=", and a string value may be missing its closing quote at the end of the line. 
+		r'([^=]*)=(?:"([^"]*)"?|([^ ]*))[ "]*')
+	
 	def handleRawStatusLine(self, file, line, userStatusConfig=None, **extra):
 		"""
 		Handles a raw status line which may be a correlator status line or a user-defined one
@@ -788,39 +997,29 @@ class LogAnalyzer(object):
 		
 		"""
 		m = line.message
-		d = collections.OrderedDict()
+		d = {} # plain dict (which preserves insertion order) is cheaper than OrderedDict
 		d['datetime'] = line.getDetails()['datetimestring']
 		
 		# TODO: fix the epoch calculation; treating this as UTC isn't correct since it probably isn't
-		d['epoch secs'] = line.getDateTime().replace(tzinfo=datetime.timezone.utc).timestamp()
+		d['epoch secs'] = (line.getDateTime()-UTC_EPOCH).total_seconds()
 
 		d['line num'] = line.lineno
 				
 		i = m.index(':')+2
 		mlen = len(m)
+		keyValueRegex = LogAnalyzer.STATUS_LINE_KEY_VALUE_REGEX
 		while i < mlen:
-			# cope with space-delimited values and/or strings
-			key = ''
-			while i < mlen and m[i]!='=':
-				key+= m[i]
-				i += 1
-			if i == mlen:
+			kv = keyValueRegex.match(m, i)
+			if kv is None:
+				key = m[i:]
 				# this can happen if (mysteriously) a line break character is missing at end of status line (seen in 10.3.3); better to limp on rather than throwing; but ignore the <...> message we include at the end of JMS status lines
 				(log.debug if (key.startswith('<') and key.endswith('>')) else log.warning)(f'Ignoring the rest of status log line {line.lineno}; expected "=" but found end of line: "{key}"')
 				break # don't ignore the bits we already parsed out successfully
-			assert m[i] == '=', (m, repr(m[i]))
-			i+=1
-			if m[i]=='"':
-				endchar = '"'
-				i+=1
-			else:
-				endchar = ' '
-			val = ''
-			while i < mlen and m[i] != endchar:
-				if endchar != '"' or m[i] != ',': # if not a string, suppress thousands character
-					val += m[i]
-				i+=1
-			if endchar != '"':
+			key, quotedval, val = kv.groups()
+			i = kv.end()
+			if quotedval is not None:
+				val = quotedval.replace(',', '') # strings have the "," character stripped
+			elif val and val[0] in '-+.0123456789': # avoid the cost of raising an exception for values that obviously aren't numbers
 				try:
 					if val.endswith('%') and val[:-1].replace('.','').isdigit(): val = val[:-1] # for user-defined % values which would otherwise not be graphable
 					if '.' in val:
@@ -830,7 +1029,6 @@ class LogAnalyzer(object):
 				except Exception:
 					pass
 			d[key] = val
-			while i < mlen and m[i] in {' ', '"'}: i+=1
 		if not d: return
 		
 		#log.debug('Extracted status line %s: %s', d)
@@ -862,7 +1060,7 @@ class LogAnalyzer(object):
 				if previousStatus is None or (previousStatus['restarts'] != len(file['startupStanzas'])): 
 					previousStatus = {
 						'restarts': len(file['startupStanzas']), 
-						'epoch secs': (file['startTime'].replace(tzinfo=datetime.timezone.utc).timestamp()) if file['startTime'] is not None else -1,
+						'epoch secs': (file['startTime']-UTC_EPOCH).total_seconds() if file['startTime'] is not None else -1,
 					}
 					self.previousUserStatus[fieldPrefix] = previousStatus
 					
@@ -885,6 +1083,9 @@ class LogAnalyzer(object):
 		else: # a normal correlator status line (not user status)
 			self.handleRawStatusDict(file=file, line=line, status=d)	
 		
+	OMIT_GENERATED_VALUE = object()
+	"""Sentinel returned by a generated column calculator to leave that column out of the annotated status. """
+	
 	def handleRawStatusDict(self, file, line, status=None, **extra):
 		"""
 		Accepts a raw (non-annotated) correlator status dictionary and converts it to an annotated status 
@@ -902,19 +1103,16 @@ class LogAnalyzer(object):
 				for every line in the file, based on a prototype status dictionary. 
 				"""
 				
-				columns = collections.OrderedDict()
-				allkeys = set(status.keys())
-				for k in COLUMN_DISPLAY_NAMES:
+				columns = {}
+				for k, displayName in COLUMN_DISPLAY_NAMES.items():
 					if k.startswith('='):
 						columns[k] = k[1:]
-					elif k in allkeys:
-						columns[k] = COLUMN_DISPLAY_NAMES[k] or k
-						allkeys.remove(k)
+					elif k in status:
+						columns[k] = displayName or k
 					else:
 						log.debug('This log file does not contain key: %s', k)
-				for k in status:
-					if k in allkeys:
-						columns[k] = k
+				for k in status: # any keys we don't know about go at the end
+					columns.setdefault(k, k)
 				
 				# now add on any user-defined status keys; always add these regardless of whether they're yet set, 
 				# since they may come from EPL code that hasn't been injected yet and we can't change the columns later
@@ -945,7 +1143,77 @@ class LogAnalyzer(object):
 
 				return columns
 
+			def decideColumnCalculators(columns):
+				"""
+				Returns a list of (key, display name, calculate, needsPrevious, kbToMB) tuples for each column, so that 
+				the decision about how to populate each column is made once per file rather than for every status line. 
+				
+				calculate is None for values copied from the status line, or else a 
+				function(status, previousStatus, secsSinceLast, line) returning the generated value, or 
+				OMIT_GENERATED_VALUE if it should be left out. If needsPrevious is True, the value is 0 
+				when there's no previous status to calculate it from. 
+				"""
+				OMIT = LogAnalyzer.OMIT_GENERATED_VALUE
+				
+				def isSwapping(status, previousStatus, secsSinceLast, line):
+					try:
+						val = 1 if (status['si']+status['so']>0) else 0
+					except KeyError: # not present in all Apama versions
+						return OMIT
+					except TypeError: # si/so can sometimes take values such as "-nan(ind)", in which case just ignore
+						return OMIT
+					if val == 1: 
+						file.setdefault('swappingStartLine', line)
+						file.pop('swappingEndLine',None)
+					elif 'swappingEndLine' not in file:
+						file['swappingEndLine'] = line
+					return val
+				
+				def rate(k):
+					return lambda status, previousStatus, secsSinceLast, line: (status[k]-previousStatus[k])/secsSinceLast
+				
+				def deltaMB(k, optional):
+					def calculate(status, previousStatus, secsSinceLast, line):
+						try:
+							return (status[k]-previousStatus[k])/1024.0
+						except KeyError: # not present in all Apama versions
+							if optional: return OMIT
+							raise
+					return calculate
+				
+				calculators = { # generated key: (needsPrevious, calculate)
+					'=is swapping': (False, isSwapping),
+					'=interval secs': (False, lambda status, previousStatus, secsSinceLast, line: secsSinceLast),
+					
+					'=errors': (True, lambda status, previousStatus, secsSinceLast, line: file['errorsCount']-previousStatus['errors']),
+					'=warns': (True, lambda status, previousStatus, secsSinceLast, line: file['warningsCount']-previousStatus['warns']),
+					'=errors /sec': (True, lambda status, previousStatus, secsSinceLast, line: (file['errorsCount']-previousStatus['errors'])/secsSinceLast),
+					'=warns /sec': (True, lambda status, previousStatus, secsSinceLast, line: (file['warningsCount']-previousStatus['warns'])/secsSinceLast),
+					'=log lines /sec': (True, rate('line num')),
+					
+					'=rx /sec': (True, rate('rx')),
+					'=tx /sec': (True, rate('tx')),
+					'=rt /sec': (True, rate('rt')),
+					
+					'=pm delta MB': (True, deltaMB('pm', optional=True)),
+					'=vm delta MB': (True, deltaMB('vm', optional=False)),
+					'=jvm delta MB': (True, deltaMB('jvm', optional=True)),
+				}
+				
+				result = []
+				for k, displayName in columns.items():
+					if not k.startswith('='):
+						result.append((k, displayName, None, False, displayName in ['pm=resident MB', 'vm=virtual MB']))
+					elif k.endswith(' avg'): # moving averages are handled separately
+						result.append((k, displayName, lambda status, previousStatus, secsSinceLast, line: OMIT, True, False))
+					else:
+						assert k in calculators, 'Unknown generated key: %s'%k
+						needsPrevious, calculate = calculators[k]
+						result.append((k, displayName, calculate, needsPrevious, False))
+				return result
+			
 			self.columns = decideColumns(status)
+			self.columnCalculators = decideColumnCalculators(self.columns)
 			for w in self.writers:
 				w.writeHeader(
 					columns=self.columns.values(), 
@@ -953,7 +1221,6 @@ class LogAnalyzer(object):
 				)
 			
 		d = {}
-		display = self.columns # local var to speed up lookup
 		
 		seconds = status['epoch secs'] # floating point epoch seconds
 		
@@ -965,7 +1232,7 @@ class LogAnalyzer(object):
 		
 		if previousStatus is None:
 			if file['startTime'] is not None:
-				secsSinceLast = status['epoch secs']-file['startTime'].replace(tzinfo=datetime.timezone.utc).timestamp()
+				secsSinceLast = status['epoch secs']-(file['startTime']-UTC_EPOCH).total_seconds()
 			else:
 				secsSinceLast = -1 # hopefully won't happen
 		else:
@@ -978,69 +1245,22 @@ class LogAnalyzer(object):
 		status['warns'] = 0 if previousStatus is None else file['warningsCount']
 		status['errors'] = 0 if previousStatus is None else file['errorsCount']
 		
-		for k in display:
-			if k.startswith('='): # computed values
-				if k == '=is swapping':
-					try:
-						val = 1 if (status['si']+status['so']>0) else 0
-					except KeyError: # not present in all Apama versions
-						continue
-					except TypeError: # si/so can sometimes take values such as "-nan(ind)", in which case just ignore
-						continue
-					if val == 1: 
-						file.setdefault('swappingStartLine', line)
-						file.pop('swappingEndLine',None)
-					elif 'swappingEndLine' not in file:
-						file['swappingEndLine'] = line
-
-				elif k == '=interval secs':
-					val = secsSinceLast
-					
-				elif previousStatus is None or secsSinceLast <= 0: # can't calculate rates if for some reason we have a negative divisor (else div by zero)
-					val = 0
-
-				elif k == '=errors':
-					val = (file['errorsCount']-previousStatus['errors'])
-				elif k == '=warns':
-					val = (file['warningsCount']-previousStatus['warns'])
-
-				elif k == '=errors /sec':
-					val = (file['errorsCount']-previousStatus['errors'])/secsSinceLast
-				elif k == '=warns /sec':
-					val = (file['warningsCount']-previousStatus['warns'])/secsSinceLast
-
-				elif k == '=log lines /sec':
-					# avoid skewing the stats with data from before the start
-					val = 0 if previousStatus is None else (status['line num']-previousStatus['line num'])/secsSinceLast
-
-				elif k == '=rx /sec':
-					val = (status['rx']-previousStatus['rx'])/secsSinceLast
-				elif k == '=tx /sec':
-					val = (status['tx']-previousStatus['tx'])/secsSinceLast
-				elif k == '=rt /sec':
-					val = (status['rt']-previousStatus['rt'])/secsSinceLast
-				elif k == '=pm delta MB':
-					try:
-						val = (status['pm']-previousStatus['pm'])/1024.0
-					except KeyError: # not present in all Apama versions
-						continue
-				elif k == '=vm delta MB':
-					val = (status['vm']-previousStatus['vm'])/1024.0
-				elif k.endswith(' avg'): continue # handled below
-				elif k == '=jvm delta MB':
-					try:
-						val = (status['jvm']-previousStatus['jvm'])/1024.0
-					except KeyError: # not present in all Apama versions
-						continue
-				else:
-					assert False, 'Unknown generated key: %s'%k
-			else:
+		canCalculateRates = previousStatus is not None and secsSinceLast > 0 # can't calculate rates if for some reason we have a negative divisor (else div by zero)
+		userStatus = self.userStatus
+		OMIT = LogAnalyzer.OMIT_GENERATED_VALUE
+		for k, displayName, calculate, needsPrevious, kbToMB in self.columnCalculators:
+			if calculate is None:
 				val = status.get(k, None)
-				if val is None: val = self.userStatus.get(k, None)
-				if display[k] in ['pm=resident MB', 'vm=virtual MB'] and val is not None:
+				if val is None: val = userStatus.get(k, None)
+				if kbToMB and val is not None:
 					val = val/1024.0 # kb to MB
+			elif needsPrevious and not canCalculateRates:
+				val = 0
+			else:
+				val = calculate(status, previousStatus, secsSinceLast, line)
+				if val is OMIT: continue
 
-			d[display[k]] = val
+			d[displayName] = val
 
 		# moving averages
 		avgSecsPerWindow = 60 # approx 12 points if once per 5 secs = 1 minute
@@ -1093,28 +1313,30 @@ class LogAnalyzer(object):
 					file['status-floatKeys'].add(k)
 		self.previousAnnotatedStatus = status
 		file['totalStatusLinesInFile'] += 1
+		# this is called for every status line so avoid repeatedly looking up the per-file dicts
+		statusMin, statusMax, statusSum, floatKeys = file['status-min'], file['status-max'], file['status-sum'], file['status-floatKeys']
 		for k, v in status.items():
 			if v is None or isinstance(v, str): continue
 			try:
-				if v < file['status-min'][k]: file['status-min'][k] = v
+				if v < statusMin[k]: statusMin[k] = v
 			except Exception: # this happens for user-defined statuses which weren't initialized right at the start
-				if file['status-min'][k] is None:
-					file['status-min'][k] = v
-					file['status-max'][k] = v
-					file['status-sum'][k] = 0
+				if statusMin[k] is None:
+					statusMin[k] = v
+					statusMax[k] = v
+					statusSum[k] = 0
 				else: raise
 
-			if v > file['status-max'][k]: 
-				file['status-max'][k] = v
-				file['status-max'][k+'.line'] = line # also useful to have datetime/linenum for the maximum ones
+			if v > statusMax[k]: 
+				statusMax[k] = v
+				statusMax[k+'.line'] = line # also useful to have datetime/linenum for the maximum ones
 			
 			if v != 0: 
-				if k in file['status-floatKeys']: 
+				if k in floatKeys: 
 					# for precision, use integers (which in python have infinite precision!) 
 					# to keep runnning total, even for float types; 
 					# to get final number that look right to 4 dp, scale up by 6 dp
 					v = int(1000000*v) 
-				file['status-sum'][k] += v
+				statusSum[k] += v
 
 	def handleFilePercentComplete(self, file, percent, **extra):
 		# update status summary
@@ -1880,7 +2102,7 @@ class LogAnalyzer(object):
 				self.overviewHTML += html
 				# strip out HTML tags and un-escape named entities
 				if html.startswith('<li>'): html = '- '+html # textual equivalent
-				txt = xml.sax.saxutils.unescape(re.sub('<[^>]+>', '', html))
+				txt = unescapetext(re.sub('<[^>]+>', '', html))
 				txt = txt.replace(' ...\n', '\n') # remove <a>... links 
 				out.write(txt)
 			def writeln(html):
@@ -2468,6 +2690,40 @@ span.overview { }
 		return x
 	
 
+def _initFileProcessingWorker(analyzerBytes, loglevel):
+	global _workerAnalyzerBytes
+	_workerAnalyzerBytes = analyzerBytes
+	if not logging.getLogger().handlers: # unless inherited from the parent process
+		logging.basicConfig(format=u'%(levelname)-5s - %(message)s', stream=sys.stderr, level=loglevel)
+
+def _processFileInWorker(file):
+	"""
+	Processes a single file in a worker process for LogAnalyzer.processFilesInParallel. 
+	
+	@return: A tuple (file, warns, errors) containing the updated file dictionary and its warn/error trackers, 
+	or a string giving the reason if the file must be processed again in the main process. 
+	"""
+	import pickle
+	analyzerClass, args = pickle.loads(_workerAnalyzerBytes) # a fresh copy of args for each file so no state leaks between them
+	analyzer = analyzerClass(args)
+	analyzer.CHARTS.update(getattr(args, 'userCharts', {})) # in case this process didn't inherit the customized CHARTS
+	analyzer.files = [file]
+	analyzer.handleAllFilesStarted()
+	analyzer._processFileWithRestarts(file)
+	
+	startupContentsFile = file.pop('startupContentsFile', None) # this file handle can't be sent back to the main process
+	if startupContentsFile is not None: startupContentsFile.close()
+
+	if analyzer.hasKeyedUserStatusColumns(isApamaCtrl=file['isApamaCtrl']):
+		return 'it contains keyed user status lines'
+	
+	# if the limit was reached, messages that earlier files already added might have been dropped here
+	XmaxUniqueWarnOrErrorLines = args.XmaxUniqueWarnOrErrorLines
+	if XmaxUniqueWarnOrErrorLines>0 and max(len(analyzer.warns), len(analyzer.errors)) >= XmaxUniqueWarnOrErrorLines:
+		return 'it reached the XmaxUniqueWarnOrErrorLines limit'
+	
+	return file, analyzer.warns, analyzer.errors
+
 class LogAnalyzerTool(object):
 	"""
 	Class for the command line tool. Subclass this if you wish to add extra 
@@ -2496,6 +2752,15 @@ class LogAnalyzerTool(object):
 		self.argparser.add_argument('--json', action='store_true',
 			help='Advanced/debugging option to additionally write output in JSON format suitable for processing by scripts.')
 
+		def nonNegativeInt(value):
+			if not re.fullmatch('[0-9]+', value): raise argparse.ArgumentTypeError(f'must be a non-negative integer: {value}')
+			return int(value)
+		self.argparser.add_argument('--jobs', '-j', metavar='N', default=1, type=nonNegativeInt,
+			help='The number of processes to use for analyzing multiple log files in parallel. Specify 0 to use one per CPU. '
+				'Files whose results depend on other files (those containing keyed status lines such as apama-ctrl logs, '
+				'those with the same name as another file, and those reaching the XmaxUniqueWarnOrErrorLines limit) are '
+				'analyzed one at a time in the main process, so will not be any faster.')
+
 		self.argparser.add_argument('--config', metavar="FILE.json", type=str,
 			help='Configure the analyzer for advanced functionality such as custom/user-supplied log line extraction.')
 
@@ -2516,7 +2781,7 @@ class LogAnalyzerTool(object):
 
 		log.info('Apama log analyzer v%s (locale=%s)'%(__version__, locale.getdefaultlocale()[0]))
 		
-		duration = time.time()
+		duration = time.perf_counter()
 		
 		globbedpaths = []
 		
@@ -2680,11 +2945,12 @@ class LogAnalyzerTool(object):
 		
 		manager = self.analyzerFactory(args)
 		manager.CHARTS.update(userCharts) # allow overriding existing charts if desired
+		args.userCharts = userCharts # so that worker processes can do the same
 
 		manager.processFiles(sorted(list(logpaths)))
 
-		duration = time.time()-duration
-		log.info('Completed analysis in %s', (('%d seconds'%duration) if duration < 120 else ('%0.1f minutes' % (duration/60))))
+		duration = time.perf_counter()-duration
+		log.info('Completed analysis in %s', formatDuration(duration))
 		if args.autoOpen or os.getenv('APAMA_ANALYZER_AUTO_OPEN')=='true':
 			log.info(f'Automatically opening {os.path.normpath(args.outputUserFriendly+"/overview.html")}')
 			os.system('"'+os.path.normpath(args.outputUserFriendly+"/overview.html")+'"')
@@ -0,0 +1,108 @@
+__pysys_title__   = r""" Multiple input logs - analyzing in parallel with --jobs"""
+#                        ================================================================================
+
+__pysys_purpose__ = r""" Check that analyzing files in worker processes gives exactly the same output as analyzing them one at a time,
+	including merging of warn/error summaries across files (also when the unique message limit is hit, either within
+	one file or only once the files are merged), and files
+	that depend on other files so must be processed in the main process: keyed (apama-ctrl) status lines whose columns
+	depend on earlier files, and files with the same name which write the same output files. Also check that an
+	analyzer which has already processed some files can be reused with --jobs.
+	"""
+
+__pysys_created__ = "2026-10-15"
+
+import os
+
+import pysys
+from pysys.constants import *
+from correlatorloganalyzer.analyzer_basetest import AnalyzerBaseTest
+
+class PySysTest(AnalyzerBaseTest):
+
+	def analyzeSequentialAndParallel(self, name, arguments, logfiles, jobs):
+		self.logAnalyzer(['--json', '--XmaxSampleWarnOrErrorLines', '0']+arguments, logfiles=logfiles, stdouterr=name+'-sequential')
+		self.logAnalyzer(['--json', '--XmaxSampleWarnOrErrorLines', '0', '--jobs', str(jobs)]+arguments, logfiles=logfiles, stdouterr=name+'-parallel')
+
+	def execute(self):
+		# reuse the inputs of other tests rather than keeping copies of them here
+		testsDir = os.path.dirname(self.descriptor.testDir)
+		for src, dest in [
+				('Cor_009/Input/correlator1.log', 'multiple/correlator1.log'),
+				('Cor_009/Input/correlator2.log', 'multiple/correlator2.log'),
+				('Cor_009/Input/correlator3.log', 'multiple/correlator3.log'),
+				('Cor_009/Input/correlator4.log', 'multiple/correlator4.log'),
+				('Cor_020/correlator.log', 'multiple/correlator5-apama-ctrl.log'),
+				('Cor_020/correlator.log', 'apamactrl/a-ctrl.log'),
+				('Cor_007/Input/apama-ctrl-10.5.0.2.log', 'apamactrl/b-ctrl.log'),
+				('Cor_009/Input/correlator2.log', 'dupnames/host1/correlator.log'),
+				('Cor_009/Input/correlator3.log', 'dupnames/host2/correlator.log'),
+			]:
+			self.mkdir(os.path.dirname(self.output+'/'+dest))
+			self.copy(testsDir+'/'+src, self.output+'/'+dest)
+		multipleLogs = sorted(self.output+'/multiple/'+f for f in os.listdir(self.output+'/multiple'))
+
+		self.analyzeSequentialAndParallel('multiple', [], logfiles=multipleLogs, jobs=3)
+
+		# a2 contains the first message from a1 after hitting the limit with its own messages
+		self.analyzeSequentialAndParallel('uniquelimit', ['--XmaxUniqueWarnOrErrorLines', '2'], logfiles=['uniquelimit/a1.log', 'uniquelimit/a2.log'], jobs=2)
+
+		# neither file reaches the limit on its own, so it's applied when merging the results from the workers
+		self.analyzeSequentialAndParallel('uniquemerge', ['--XmaxUniqueWarnOrErrorLines', '3'], logfiles=['uniquelimit/a1.log', 'uniquelimit/a3.log'], jobs=2)
+
+		# a-ctrl has enough ProxyStatus keys to double maxKeysToAllocateColumnsFor, which affects the columns of b-ctrl
+		self.analyzeSequentialAndParallel('apamactrl', [], logfiles=[self.output+'/apamactrl/a-ctrl.log', self.output+'/apamactrl/b-ctrl.log'], jobs=2)
+
+		# the second file's output replaces the first's
+		self.analyzeSequentialAndParallel('dupnames', [], logfiles=[self.output+'/dupnames/host1/correlator.log', self.output+'/dupnames/host2/correlator.log', 
+			self.output+'/multiple/correlator1.log', self.output+'/multiple/correlator4.log'], jobs=2)
+
+		# only one file could go to a worker
+		self.logAnalyzer(['--jobs', '2'], logfiles=[self.output+'/dupnames/host1/correlator.log', self.output+'/dupnames/host2/correlator.log', 
+			self.output+'/multiple/correlator1.log'], stdouterr='oneworker')
+
+		for jobs, stdouterr in [(1, 'reuse-sequential'), (3, 'reuse-parallel')]:
+			self.logAnalyzer(['--json', '--XmaxSampleWarnOrErrorLines', '0', '--jobs', str(jobs)], logfiles=multipleLogs, 
+				script=self.input+'/reuse.py', stdouterr=stdouterr, 
+				environs=self.createEnvirons({'PYTHONPATH':os.path.dirname(self.project.logAnalyzerScript)+'/..'}, command=sys.executable))
+
+		self.startProcess(sys.executable, [self.project.logAnalyzerScript, '--jobs', '-1', self.output+'/multiple/correlator1.log'],
+			stdouterr='negativejobs', expectedExitStatus='!=0')
+
+	def validate(self):
+		for name in ['multiple', 'uniquelimit', 'uniquemerge', 'apamactrl', 'dupnames', 'reuse']:
+			self.checkForAnalyzerErrors(stdouterr=name+'-sequential')
+			self.checkForAnalyzerErrors(stdouterr=name+'-parallel')
+
+			outputFiles = sorted(f for f in os.listdir(self.output+f'/{name}-sequential_output') if os.path.isfile(self.output+f'/{name}-sequential_output/'+f))
+			self.assertThat('len(outputFiles) > 5', outputFiles=outputFiles)
+			for f in outputFiles:
+				# the title of the overview contains the output directory name
+				self.assertDiff(self.output+f'/{name}-parallel_output/'+f, self.output+f'/{name}-sequential_output/'+f, ignores=['_output - '])
+
+		self.assertGrep('multiple-parallel.err', 'Analyzing 5 files using 3 processes')
+		self.assertGrep('multiple-parallel.err', 'Analyzing correlator5-apama-ctrl in this process since it may contain keyed user status lines')
+
+		self.assertGrep('uniquelimit-sequential_output/logged_warnings.txt', '2x: Alpha warning one')
+		self.assertGrep('uniquelimit-parallel.err', 'Analyzing 2 files using 2 processes')
+		self.assertGrep('uniquelimit-parallel.err', 'Analyzing a2 again in this process since it reached the XmaxUniqueWarnOrErrorLines limit')
+
+		self.assertGrep('uniquemerge-sequential_output/logged_warnings.txt', 'Foxtrot warning six')
+		self.assertGrep('uniquemerge-sequential_output/logged_warnings.txt', 'Echo warning five', contains=False)
+		self.assertGrep('uniquemerge-parallel.err', 'Analyzing 2 files using 2 processes')
+		self.assertGrep('uniquemerge-parallel.err', 'again in this process', contains=False)
+
+		self.assertGrep('apamactrl-sequential.err', 'hit maxKeysToAllocateColumnsFor limit 4')
+		self.assertGrep('apamactrl-parallel.err', 'Analyzing files one at a time since they all depend on other files')
+
+		self.assertGrep('dupnames-parallel.err', 'Analyzing correlator in this process since it has the same name as another file')
+		self.assertLineCount('dupnames-parallel.err', 'Analyzing correlator in this process', condition='==2')
+		self.assertGrep('dupnames-parallel.err', 'Analyzing 4 files using 2 processes')
+
+		self.checkForAnalyzerErrors(stdouterr='oneworker')
+		self.assertGrep('oneworker.err', 'Analyzing files one at a time since all but one of them depend on other files')
+		self.assertGrep('oneworker.err', 'using 1 process', contains=False)
+
+		self.assertGrep('reuse-parallel.err', 'Analyzing 5 files using 3 processes')
+		self.assertGrep('reuse-parallel.err', 'again in this process', contains=False)
+
+		self.assertGrep('negativejobs.err', 'argument --jobs/-j: must be a non-negative integer: -1')
@@ -0,0 +1,14 @@
+# Analyzes the files twice with the same analyzer instance, first one at a time and then with the specified --jobs
+import sys
+from apamax.log_analyzer import LogAnalyzer, LogAnalyzerTool
+
+class ReusedLogAnalyzer(LogAnalyzer):
+	def processFiles(self, filepaths):
+		jobs = self.args.jobs
+		self.args.jobs = 1
+		super().processFiles(filepaths)
+		self.args.jobs = jobs
+		super().processFiles(filepaths)
+
+if __name__ == '__main__':
+	sys.exit(LogAnalyzerTool(analyzerFactory=ReusedLogAnalyzer).main(sys.argv[1:]))
@@ -0,0 +1,16 @@
+# Analyzer subclass which extracts information from INFO messages that aren't handled by the base class
+import sys
+from apamax.log_analyzer import LogAnalyzer, LogAnalyzerTool, log
+
+class CustomLogAnalyzer(LogAnalyzer):
+	def __init__(self, args):
+		super().__init__(args)
+		self.registerLinePrefilter('Wanted message')
+
+	def handleLine(self, file, line, previousLine, **extra):
+		if line.message.startswith(('Wanted message', 'Other message')):
+			log.info('Custom handleLine got: %s', line.message)
+		return super().handleLine(file=file, line=line, previousLine=previousLine, **extra)
+
+if __name__ == '__main__':
+	sys.exit(LogAnalyzerTool(analyzerFactory=CustomLogAnalyzer).main(sys.argv[1:]))
@@ -0,0 +1,34 @@
+__pysys_title__   = r""" Custom analyzer - INFO lines passed to handleLine with registerLinePrefilter"""
+#                        ================================================================================
+
+__pysys_purpose__ = r""" Check that INFO lines after the startup stanza only reach a subclass's handleLine if they contain a
+	substring registered with registerLinePrefilter, and that skipping the other INFO lines doesn't affect the previous
+	line used for merging multi-line errors, or the end time of the file.
+	"""
+
+__pysys_created__ = "2026-10-15"
+
+import os
+
+import pysys
+from pysys.constants import *
+from correlatorloganalyzer.analyzer_basetest import AnalyzerBaseTest
+
+class PySysTest(AnalyzerBaseTest):
+
+	def execute(self):
+		self.logAnalyzer([], logfiles=['correlator.log'], script=self.input+'/custom.py', 
+			environs=self.createEnvirons({'PYTHONPATH':os.path.dirname(self.project.logAnalyzerScript)+'/..'}, command=sys.executable))
+
+	def validate(self):
+		self.checkForAnalyzerErrors()
+
+		self.assertGrep('loganalyzer.err', 'Custom handleLine got: Wanted message one')
+		self.assertGrep('loganalyzer.err', 'Custom handleLine got: Other message', contains=False)
+
+		# the skipped INFO line between the errors means the second isn't part of the first
+		self.assertGrep('loganalyzer_output/logged_errors.txt', '1x: .* - First error')
+		self.assertGrep('loganalyzer_output/logged_errors.txt', '1x: .* - Second error')
+
+		# the final line is a skipped INFO line
+		self.assertGrep('loganalyzer_output/overview.txt', 'Tue 2019-07-30 18:04:29 to 18:04:40')